@@ -0,0 +1,113 @@
+"""
+Wire format shared by EMGTCPServer and EMGTCPClient.
+
+Every frame is a fixed-size 32 byte little-endian header followed by the payload
+(channels × samples values of the given dtype, channel-major):
+
+    offset  size  field
+         0     4  magic          b'EMGF'
+         4     1  version        PROTOCOL_VERSION
+         5     1  dtype_code     see DTYPE_CODES
+         6     2  channels       number of rows in the payload
+         8     2  samples        samples per channel in the payload
+        10     2  subscription   id of the channel subscription the payload follows (0 = all channels)
+        12     8  sequence       frame counter, increases by one per frame
+        20     8  timestamp      server time.monotonic() when the frame was sent
+        28     4  sampling_rate  sampling frequency of the payload in Hz
+
+Clients can send a subscription control message to the server at any time:
+
+    offset  size  field
+         0     4  magic          b'EMGC'
+         4     1  version        PROTOCOL_VERSION
+         5     1  decimation     keep every n-th sample (1 = all samples)
+         6     2  subscription   id chosen by the client, echoed in the frame headers
+         8     2  count          number of channel indices that follow (0 = all channels)
+        10  2*count              zero-based channel indices (uint16)
+"""
+
+import struct
+import numpy as np
+
+MAGIC = b'EMGF'
+CONTROL_MAGIC = b'EMGC'
+PROTOCOL_VERSION = 1
+
+DTYPE_CODES = {
+    1: np.dtype('<f4'),
+    2: np.dtype('<f8'),
+    3: np.dtype('<i2'),
+    4: np.dtype('<i4'),
+}
+CODES_BY_DTYPE = {dtype: code for code, dtype in DTYPE_CODES.items()}
+
+HEADER = struct.Struct('<4sBBHHHQdf')
+HEADER_SIZE = HEADER.size
+
+CONTROL_HEADER = struct.Struct('<4sBBHH')
+CONTROL_HEADER_SIZE = CONTROL_HEADER.size
+
+# same layout as HEADER, used to parse headers straight out of the receive buffer
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S4'),
+    ('version', 'u1'),
+    ('dtype_code', 'u1'),
+    ('channels', '<u2'),
+    ('samples', '<u2'),
+    ('subscription', '<u2'),
+    ('sequence', '<u8'),
+    ('timestamp', '<f8'),
+    ('sampling_rate', '<f4'),
+])
+
+
+def wire_dtype(dtype):
+    """
+    Returns the little-endian dtype used on the wire for the given array dtype.
+    Unsupported dtypes are sent as float32.
+    """
+    dtype = np.dtype(dtype).newbyteorder('<')
+    if dtype not in CODES_BY_DTYPE:
+        return DTYPE_CODES[1]
+    return dtype
+
+
+def pack_header(buffer, sequence, timestamp, channels, samples, dtype, sampling_rate, subscription=0, offset=0):
+    """
+    Writes a frame header into a preallocated buffer.
+    """
+    HEADER.pack_into(buffer, offset, MAGIC, PROTOCOL_VERSION, CODES_BY_DTYPE[np.dtype(dtype)],
+                     channels, samples, subscription, sequence, timestamp, sampling_rate)
+
+
+def pack_subscription(subscription, channels=None, decimation=1):
+    """
+    Builds a subscription control message. channels=None subscribes to all channels.
+    """
+    indices = np.asarray([] if channels is None else channels, dtype='<u2')
+    return CONTROL_HEADER.pack(CONTROL_MAGIC, PROTOCOL_VERSION, decimation, subscription, len(indices)) \
+        + indices.tobytes()
+
+
+def unpack_control_header(data):
+    """
+    Parses the fixed part of a control message.
+
+    Returns:
+        tuple: (decimation, subscription, count)
+    """
+    magic, version, decimation, subscription, count = CONTROL_HEADER.unpack(data)
+    if magic != CONTROL_MAGIC or version != PROTOCOL_VERSION:
+        raise ValueError(f"Invalid control message {bytes(data)!r}")
+    return decimation, subscription, count
+
+
+def frame_dtype(channels, samples, dtype_code):
+    """
+    Structured dtype of one complete frame (header + payload), so a buffer holding
+    several frames can be viewed as an array of frames without copying.
+    """
+    return np.dtype([
+        ('header', HEADER_DTYPE),
+        ('payload', DTYPE_CODES[dtype_code], (channels, samples)),
+    ])
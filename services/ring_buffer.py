@@ -0,0 +1,77 @@
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Preallocated (channels × capacity) float32 ring buffer for streamed signal data.
+
+    Designed for exactly one writer thread and any number of reader threads. The writer
+    copies the new samples into place first and only then advances the monotonically
+    increasing write cursor, so readers never need a lock: everything before the cursor
+    they observe is complete. Readers must keep up to within `capacity` samples of the
+    writer, otherwise the oldest part of their span has already been overwritten.
+
+    Attributes:
+        channels (int): Number of rows (channels) in the buffer
+        capacity (int): Number of samples kept per channel
+        write_index (int): Total number of samples ever written (monotonic cursor)
+    """
+
+    def __init__(self, channels, capacity):
+        self.channels = channels
+        self.capacity = capacity
+        self.data = np.zeros((channels, capacity), dtype=np.float32)
+        self.write_index = 0
+
+    def write(self, block, rows=None):
+        """
+        Append a (channels, samples) block and advance the write cursor.
+
+        If rows is given, the block only holds those channels; the other channels are
+        left untouched for this span.
+        """
+        if rows is None:
+            rows = slice(None)
+        n = block.shape[-1]
+        if n > self.capacity:
+            # only the newest samples survive anyway
+            skipped = n - self.capacity
+            block = block[..., skipped:]
+            self.write_index += skipped
+            n = self.capacity
+
+        start = self.write_index % self.capacity
+        first = min(n, self.capacity - start)
+        self.data[rows, start:start + first] = block[..., :first]
+        if first < n:
+            self.data[rows, :n - first] = block[..., first:]
+
+        self.write_index += n
+
+    def write_frames(self, frames, rows=None):
+        """
+        Append a (frames, channels, samples) batch as one continuous block.
+        """
+        for frame in frames:
+            self.write(frame, rows)
+
+    def read(self, start, stop):
+        """
+        Returns a (channels, stop - start) copy of the samples between two cursor positions.
+        """
+        n = stop - start
+        if n <= 0:
+            return np.empty((self.channels, 0), dtype=np.float32)
+
+        begin = start % self.capacity
+        if begin + n <= self.capacity:
+            return self.data[:, begin:begin + n].copy()
+        first = self.capacity - begin
+        return np.concatenate((self.data[:, begin:], self.data[:, :n - first]), axis=1)
+
+    def latest(self, n):
+        """
+        Returns a copy of the newest n samples of every channel.
+        """
+        stop = self.write_index
+        return self.read(max(0, stop - n), stop)
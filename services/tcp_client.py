@@ -1,17 +1,67 @@
+import select
 import socket
+import threading
 import numpy as np
 import time
 
+try:
+    from services.frame_protocol import HEADER_DTYPE, HEADER_SIZE, MAGIC, PROTOCOL_VERSION, DTYPE_CODES, frame_dtype, \
+        pack_subscription
+except ImportError:
+    # when run from inside the services directory
+    from frame_protocol import HEADER_DTYPE, HEADER_SIZE, MAGIC, PROTOCOL_VERSION, DTYPE_CODES, frame_dtype, \
+        pack_subscription
+
 
 class EMGTCPClient:
-    def __init__(self, host='localhost', port=12345):
+    def __init__(self, host='localhost', port=12345, max_frames=32):
         self.host = host
         self.port = port
         self.socket = None
         self.connected = False
+        self.window_count = 0
+
+        # Stream geometry, updated from the frame headers sent by the server
         self.CHANNELS = 32
         self.SAMPLES_PER_PACKET = 18
-        self.window_count = 0
+        self.dtype_code = 1
+        self.sampling_rate = None
+
+        # Stream health, see receive_frames()
+        self.last_sequence = None
+        self.frames_lost = 0
+        self.latency = None
+        self.last_headers = None
+
+        # Channel subscriptions sent to the server, by id. 0 is the default "all channels".
+        self._subscriptions = {0: None}
+        self._subscription_id = 0
+        self.subscription = 0
+        self.frame_channels = None  # channel indices of the rows returned by receive_frames()
+
+        # Preallocated receive buffer that can hold up to max_frames complete frames.
+        # Frames handed out by receive_frames() are views into this buffer and stay
+        # valid until the next call.
+        self.max_frames = max_frames
+        self._buffer = bytearray()
+        self._pending = 0   # bytes currently held in the buffer
+        self._consumed = 0  # bytes handed out by the previous call
+        self._configure(self.CHANNELS, self.SAMPLES_PER_PACKET, self.dtype_code)
+
+    def _configure(self, channels, samples, dtype_code):
+        """Adapt the frame layout to the geometry announced in a header"""
+        self.CHANNELS = channels
+        self.SAMPLES_PER_PACKET = samples
+        self.dtype_code = dtype_code
+        self.frame_dtype = frame_dtype(channels, samples, dtype_code)
+        self.frame_size = self.frame_dtype.itemsize
+
+        if len(self._buffer) < self.frame_size * self.max_frames:
+            # grow the buffer, keeping whatever has already been received
+            buffer = bytearray(self.frame_size * self.max_frames)
+            buffer[:self._pending] = self._buffer[:self._pending]
+            self._buffer = buffer
+            self._view = memoryview(self._buffer)
 
     def print_data(self, data):
         """Print the received chunk of data"""
@@ -24,43 +74,199 @@ class EMGTCPClient:
         try:
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.socket.connect((self.host, self.port))
+            self._pending = 0
+            self._consumed = 0
+            self.last_sequence = None
+            self._subscriptions = {0: None}
+            self.subscription = 0
+            self.frame_channels = None
             self.connected = True
             print(f"Connected to server at {self.host}:{self.port}")
         except Exception as e:
             print(f"Error connecting to server: {e}")
             self.connected = False
 
-    def receive_data(self):
-        """Receive and process EMG data from the server"""
+    def subscribe(self, channels=None, decimation=1):
+        """
+        Ask the server to only send the given zero-based channel indices (None = all channels).
+
+        With decimation > 1 the server only sends every decimation-th sample, and the frame
+        headers report the reduced sampling rate. Frames that were already in flight keep
+        the old layout; frame_channels tells which channels the rows of a batch belong to.
+        """
+        if not self.connected:
+            print("Not connected to server")
+            return
+
+        if channels is not None:
+            channels = np.asarray(sorted(set(channels)), dtype=np.intp)
+        self._subscription_id = self._subscription_id % 0xFFFF + 1
+        self._subscriptions[self._subscription_id] = channels
+        try:
+            self.socket.sendall(pack_subscription(self._subscription_id, channels, decimation))
+        except Exception as e:
+            print(f"Error sending subscription: {e}")
+            self.connected = False
+
+    def _compact(self):
+        """Move the partial frame left over from the previous call to the front of the buffer"""
+        if self._consumed:
+            remaining = self._pending - self._consumed
+            if remaining:
+                self._buffer[:remaining] = self._buffer[self._consumed:self._pending]
+            self._pending = remaining
+            self._consumed = 0
+
+    def _fill(self, min_bytes):
+        """Block with recv_into until at least min_bytes are buffered. Returns False on EOF."""
+        while self._pending < min_bytes:
+            n = self.socket.recv_into(self._view[self._pending:])
+            if n == 0:
+                return False
+            self._pending += n
+        return True
+
+    def _fill_available(self, max_bytes):
+        """Read whatever is already queued in the kernel buffer without blocking"""
+        while self._pending < max_bytes:
+            readable, _, _ = select.select([self.socket], [], [], 0)
+            if not readable:
+                break
+            n = self.socket.recv_into(self._view[self._pending:max_bytes])
+            if n == 0:
+                break
+            self._pending += n
+
+    def receive_frames(self, max_frames=None):
+        """
+        Receive one or more complete frames from the server.
+
+        Blocks until at least one full frame has arrived, then also returns any further
+        complete frames that are already waiting in the kernel buffer (up to max_frames).
+        The result is a (frames, channels, samples) view into the receive buffer, which is
+        only valid until the next call.
+        """
         if not self.connected:
             print("Not connected to server")
             return None
 
+        if max_frames is None or max_frames > self.max_frames:
+            max_frames = self.max_frames
+
         try:
-            # Receive data (32 channels × 18 samples of float32)
-            buffer_size = self.CHANNELS * self.SAMPLES_PER_PACKET * 4  # 4 bytes per float32
-            data = self.socket.recv(buffer_size)
+            self._compact()
+            if not self._fill(HEADER_SIZE):
+                if self.connected:
+                    print("Connection closed by server")
+                self.connected = False
+                return None
+
+            # parse the header in place and follow geometry changes of the stream
+            header = np.frombuffer(self._buffer, dtype=HEADER_DTYPE, count=1)[0]
+            if header['magic'] != MAGIC or header['version'] != PROTOCOL_VERSION \
+                    or header['dtype_code'] not in DTYPE_CODES:
+                raise ValueError(f"Invalid frame header {bytes(self._buffer[:HEADER_SIZE])!r}")
+            if (header['channels'], header['samples'], header['dtype_code']) != \
+                    (self.CHANNELS, self.SAMPLES_PER_PACKET, self.dtype_code):
+                self._configure(int(header['channels']), int(header['samples']), int(header['dtype_code']))
+            self.sampling_rate = float(header['sampling_rate'])
+            self.subscription = int(header['subscription'])
+            self.frame_channels = self._subscriptions.get(self.subscription)
 
-            if not data:
-                print("Connection closed by server")
+            if not self._fill(self.frame_size):
+                if self.connected:
+                    print("Connection closed by server")
                 self.connected = False
                 return None
+            if max_frames > 1:
+                self._fill_available(self.frame_size * max_frames)
+
+            # view the buffer as an array of complete frames without copying
+            num_frames = min(self._pending // self.frame_size, max_frames)
+            frames = np.frombuffer(self._buffer, dtype=self.frame_dtype, count=num_frames)
+            headers = frames['header']
 
-            # Convert received bytes to numpy array
-            # Reshape to (channels, samples)
-            data_array = np.frombuffer(data, dtype=np.float32).reshape(self.CHANNELS, self.SAMPLES_PER_PACKET)
+            # only hand out the frames that share the geometry and subscription of the first one
+            mismatch = np.flatnonzero((headers['magic'] != MAGIC) |
+                                      (headers['subscription'] != self.subscription) |
+                                      (headers['channels'] != self.CHANNELS) |
+                                      (headers['samples'] != self.SAMPLES_PER_PACKET) |
+                                      (headers['dtype_code'] != self.dtype_code))
+            if len(mismatch):
+                num_frames = int(mismatch[0])
+                frames = frames[:num_frames]
+                headers = headers[:num_frames]
+            self._consumed = num_frames * self.frame_size
 
-            return data_array
+            self._track_sequence(headers)
+            self.last_headers = headers
+
+            # (frames, channels, samples) view of the payloads
+            return frames['payload']
 
         except Exception as e:
-            print(f"Error receiving data: {e}")
+            if self.connected:
+                print(f"Error receiving data: {e}")
             self.connected = False
             return None
 
+    def _track_sequence(self, headers):
+        """Count missing frames and measure latency from the frame headers"""
+        sequence = headers['sequence']
+        if self.last_sequence is not None and sequence[0] > self.last_sequence:
+            self.frames_lost += int(sequence[-1] - self.last_sequence) - len(sequence)
+        self.last_sequence = int(sequence[-1])
+
+        # server and client share time.monotonic() only when they run on the same host
+        self.latency = time.monotonic() - float(headers['timestamp'][-1])
+
+    def receive_data(self):
+        """Receive and process EMG data from the server"""
+        frames = self.receive_frames(max_frames=1)
+        if frames is None:
+            return None
+
+        # (channels, samples) view of the single frame
+        return frames[0]
+
     def close(self):
         """Close the connection"""
         if self.socket:
-            self.socket.close()
             self.connected = False
+            try:
+                # wake up a receiver thread that is blocked in recv_into
+                self.socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.socket.close()
             print("Connection closed")
 
+
+class EMGReceiverThread(threading.Thread):
+    """
+    Background thread that continuously drains an EMGTCPClient into a RingBuffer.
+
+    All blocking socket I/O happens here, so the GUI thread only ever reads the
+    ring buffer and never waits for the network.
+    """
+
+    def __init__(self, client, ring_buffer):
+        super().__init__(daemon=True)
+        self.client = client
+        self.ring_buffer = ring_buffer
+        self.running = False
+
+    def run(self):
+        self.running = True
+        while self.running and self.client.connected:
+            frames = self.client.receive_frames()
+            if frames is None:
+                break
+            # with a channel subscription the rows only cover the subscribed channels
+            self.ring_buffer.write_frames(frames, rows=self.client.frame_channels)
+        self.running = False
+
+    def stop(self):
+        """Ask the thread to finish after the current receive"""
+        self.running = False
+
@@ -1,11 +1,96 @@
 import argparse
 import numpy as np
 import pickle
+import select
 import shutil
 import socket
 import threading
 import time
 
+try:
+    from services.frame_protocol import CONTROL_HEADER_SIZE, HEADER_SIZE, pack_header, unpack_control_header, wire_dtype
+except ImportError:
+    # when run as a script from the services directory
+    from frame_protocol import CONTROL_HEADER_SIZE, HEADER_SIZE, pack_header, unpack_control_header, wire_dtype
+
+
+class ClientSession:
+    """
+    State of one connected client: its socket, the channel subscription it asked for
+    and the sequence counter of the frames sent to it.
+    """
+
+    def __init__(self, client_socket, address, num_channels, samples_per_packet):
+        self.socket = client_socket
+        self.address = address
+        self.num_channels = num_channels
+        self.samples_per_packet = samples_per_packet
+        self.channels = None  # None = all channels
+        self.decimation = 1
+        self.subscription = 0
+        self.sequence = 0
+        self.header = bytearray(HEADER_SIZE)
+
+    def _recv_exact(self, size):
+        """Receive exactly size bytes, or None if the client closed the connection"""
+        data = bytearray()
+        while len(data) < size:
+            chunk = self.socket.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return bytes(data)
+
+    def poll_control(self):
+        """
+        Apply all control messages the client has sent, without blocking.
+        Returns False if the client closed the connection.
+        """
+        while select.select([self.socket], [], [], 0)[0]:
+            data = self._recv_exact(CONTROL_HEADER_SIZE)
+            if data is None:
+                return False
+            decimation, subscription, count = unpack_control_header(data)
+            channels = None
+            if count:
+                data = self._recv_exact(2 * count)
+                if data is None:
+                    return False
+                channels = np.frombuffer(data, dtype='<u2').astype(np.intp)
+            self.subscribe(subscription, channels, decimation)
+        return True
+
+    def subscribe(self, subscription, channels=None, decimation=1):
+        """Only send the given channels (and every decimation-th sample) from now on"""
+        if channels is not None and np.any(channels >= self.num_channels):
+            print(f"Ignoring subscription {subscription} from {self.address}: unknown channel")
+            return
+        if decimation < 1 or self.samples_per_packet % decimation:
+            # keep the samples evenly spaced across packet boundaries
+            print(f"Ignoring decimation {decimation} from {self.address}: "
+                  f"must divide {self.samples_per_packet}")
+            decimation = 1
+        self.channels = channels
+        self.decimation = decimation
+        self.subscription = subscription
+        print(f"Client {self.address} subscribed to "
+              f"{'all channels' if channels is None else [int(c) + 1 for c in channels]}"
+              f" (decimation {decimation})")
+
+    def encode(self, window, timestamp, sampling_rate, dtype):
+        """Returns header and payload of one window, reduced to the subscribed channels"""
+        data = window
+        if self.channels is not None:
+            data = data[self.channels]
+        if self.decimation > 1:
+            data = data[:, ::self.decimation]
+
+        payload = data.astype(dtype, copy=False).tobytes()
+        pack_header(self.header, self.sequence, timestamp, data.shape[0], data.shape[1], dtype,
+                    sampling_rate / self.decimation, self.subscription)
+        self.sequence += 1
+        return self.header + payload
+
 
 class EMGTCPServer:
     def __init__(self, host='localhost', port=12345, pkl_file='recording.pkl'):
@@ -26,7 +111,8 @@ class EMGTCPServer:
         try:
             with open(self.pkl_file, 'rb') as f:
                 self.data = pickle.load(f)
-            self.emg_signal = self.data['biosignal'][:32, :, :]
+            self.emg_signal = self.data['biosignal'][:self.CHANNELS, :, :]
+            self.dtype = wire_dtype(self.emg_signal.dtype)
             self.sampling_rate = self.data['device_information']['sampling_frequency']
             print(f"Data loaded successfully. Shape: {self.emg_signal.shape}")
             print(f"Sampling rate: {self.sampling_rate} Hz")
@@ -77,30 +163,35 @@ class EMGTCPServer:
                 print(f"New connection from {address}")
                 self.clients.append(client_socket)
                 # Start a new thread to handle this client
-                client_thread = threading.Thread(target=self.handle_client, args=(client_socket,))
+                client_thread = threading.Thread(target=self.handle_client, args=(client_socket, address))
                 client_thread.daemon = True
                 client_thread.start()
             except Exception as e:
                 if self.running:
                     print(f"Error accepting connection: {e}")
 
-    def handle_client(self, client_socket):
+    def handle_client(self, client_socket, address=None):
         """Handle a single client connection"""
         try:
             # Get the total number of windows
             num_windows = self.emg_signal.shape[2]
             window_index = 0
+            session = ClientSession(client_socket, address, self.emg_signal.shape[0], self.SAMPLES_PER_PACKET)
 
             while self.running and window_index < num_windows:
+                # Apply channel subscriptions sent by the client
+                if not session.poll_control():
+                    print(f"Client {address} disconnected")
+                    break
+
                 # Get the current window of data
                 current_window = self.emg_signal[..., window_index]
                 
                 # Print the data before sending
                 self.print_data(current_window, window_index)
                 
-                # Convert the data to bytes and send
-                data_bytes = current_window.tobytes()
-                client_socket.sendall(data_bytes)
+                # Reduce the data to the subscribed channels, prefix it with a frame header and send
+                client_socket.sendall(session.encode(current_window, time.monotonic(), self.sampling_rate, self.dtype))
                 
                 # Calculate sleep time based on original sampling rate
                 # Since we're sending 18 samples at a time, we need to adjust the sleep time
@@ -1,7 +1,8 @@
 from PyQt5.QtCore import QObject, pyqtSignal, QTimer
 import numpy as np
 import collections # Import collections for deque
-from services.tcp_client import EMGTCPClient
+from services.tcp_client import EMGTCPClient, EMGReceiverThread
+from services.ring_buffer import RingBuffer
 
 class MainViewModel(QObject):
     """
@@ -10,7 +11,8 @@ class MainViewModel(QObject):
     It:
     - Manages incoming live signal data by buffering it in a fixed-size window.
     - Controls the plotting state (start/stop) to animate the scrolling data.
-    - Handles the timing of updates, requesting new data chunks from the TCP client.
+    - Receives data on a background thread into a ring buffer, so the timer never blocks on the network.
+    - Handles the timing of updates, reading the newly arrived samples from the ring buffer.
     - Emits signals to update the view with the current fixed-size data window.
 
     """
@@ -45,7 +47,22 @@ class MainViewModel(QObject):
 
         self.timer.timeout.connect(self.dispatch_method)
 
+        # the receiver thread fills the ring buffer, the timer only reads from it
+        self.ring_buffer = RingBuffer(self.signal_processor.CHANNELS, self.samples_per_display_window)
+        self.read_index = 0
+
+        # catch-up policy, see next_block()
+        self.max_frames_per_tick = 8
+        self.drop_to_live_edge = True
+        self.live_edge_threshold_frames = 30
+        self.frames_coalesced = 0
+        self.frames_dropped = 0
+
+        self.receiver = EMGReceiverThread(self.signal_processor, self.ring_buffer)
+
         self.signal_processor.connect()
+        if self.signal_processor.connected:
+            self.receiver.start()
         self.list_of_ch = []
         self.buffers = {}
 
@@ -56,6 +73,8 @@ class MainViewModel(QObject):
         if not self.is_plotting:
             self.is_plotting = True
             self.data_buffer.clear()
+            # start at the live edge instead of replaying what arrived while stopped
+            self.read_index = self.ring_buffer.write_index
             self.timer.start()
             self.current_mode = current_mode
             self.dispatch_method()
@@ -70,11 +89,50 @@ class MainViewModel(QObject):
             self.data_buffer.clear()
             self.timer.stop()
 
+    def next_block(self):
+        """
+        Returns the complete frames that arrived since the last tick as a (channels, samples) array,
+        or None if there is nothing new.
+
+        Catch-up policy: all pending frames are consumed in one tick, up to max_frames_per_tick.
+        If the backlog grows beyond live_edge_threshold_frames and drop_to_live_edge is enabled,
+        the older frames are skipped so the display jumps back to the live edge.
+        """
+        samples_per_frame = self.signal_processor.SAMPLES_PER_PACKET
+        write_index = self.ring_buffer.write_index
+
+        # anything older than the ring capacity has already been overwritten
+        oldest = write_index - self.ring_buffer.capacity
+        if self.read_index < oldest:
+            skipped = -(-(oldest - self.read_index) // samples_per_frame)
+            self.frames_dropped += skipped
+            self.read_index += skipped * samples_per_frame
+
+        pending_frames = (write_index - self.read_index) // samples_per_frame
+        if pending_frames == 0:
+            if not self.receiver.is_alive():
+                print("No data received from TCP client. Check connection status or server.")
+            return None
+
+        if self.drop_to_live_edge and pending_frames > self.live_edge_threshold_frames:
+            skipped = pending_frames - self.max_frames_per_tick
+            self.frames_dropped += skipped
+            self.read_index += skipped * samples_per_frame
+            pending_frames -= skipped
+
+        num_frames = min(pending_frames, self.max_frames_per_tick)
+        self.frames_coalesced += num_frames - 1
+
+        stop = self.read_index + num_frames * samples_per_frame
+        block = self.ring_buffer.read(self.read_index, stop)
+        self.read_index = stop
+        return block
+
     def update_data(self):
         """
         Updates the data window for the plot by fetching new live data and emitting it.
         """
-        self.new_packet_all_channels = self.signal_processor.receive_data()
+        self.new_packet_all_channels = self.next_block()
 
         if self.new_packet_all_channels is not None:
             self.new_data_chunk = self.new_packet_all_channels[self.ch - 1, :]
@@ -87,8 +145,6 @@ class MainViewModel(QObject):
             self.list_of_ch.append(current_data_for_plot)
 
             self.multi_data_updated.emit(self.fixed_time_window, self.list_of_ch)
-        else:
-            print("No data received from TCP client. Check connection status or server.")
 
     def change_channel(self, channel_text):
         self.ch = channel_text
@@ -99,6 +155,16 @@ class MainViewModel(QObject):
         """
         self.checked_list = list(checked_list)
         self.create_buffers()
+        self.subscribe_channels()
+
+    def subscribe_channels(self):
+        """
+        Asks the server to only stream the channels that are currently displayed.
+        """
+        channels = {int(checkbox_obj.text()) - 1 for checkbox_obj in self.checked_list}
+        if channels and hasattr(self, 'ch'):
+            channels.add(self.ch - 1)
+        self.signal_processor.subscribe(sorted(channels) if channels else None)
 
     def dispatch_method(self):
         """
@@ -119,7 +185,7 @@ class MainViewModel(QObject):
         """
             Updates the data window for the plot by fetching new live data and emits the differential data.
         """
-        self.new_packet_all_channels = self.signal_processor.receive_data()
+        self.new_packet_all_channels = self.next_block()
 
         if self.new_packet_all_channels is not None:
             if len(self.checked_list) == 2:
@@ -133,14 +199,12 @@ class MainViewModel(QObject):
             current_data_for_plot = np.array(self.data_buffer, dtype=np.float32)
             self.list_of_ch.append(current_data_for_plot)
             self.multi_data_updated.emit(self.fixed_time_window, self.list_of_ch)
-        else:
-            print("No data received from TCP client. Check connection status or server.")
 
     def freq_update_data(self):
         """
             Updates the data window for the plot by fetching new live data and emitting the freq magnitude data.
         """
-        self.new_packet_all_channels = self.signal_processor.receive_data()
+        self.new_packet_all_channels = self.next_block()
 
         if self.new_packet_all_channels is not None:
             self.new_data_chunk = self.new_packet_all_channels[self.ch-1, :]
@@ -157,14 +221,12 @@ class MainViewModel(QObject):
             frequencies = xf[:self.samples_per_display_window // 2]
             self.list_of_ch.append(fft_magnitude)
             self.multi_data_updated.emit(frequencies, self.list_of_ch)
-        else:
-            print("No data received from TCP client. Check connection status or server.")
 
     def multi_update_data(self):
         """
         Updates the data window for the plot by fetching new live data and emitting all the data for channels that are selected.
         """
-        self.new_packet_all_channels = self.signal_processor.receive_data()
+        self.new_packet_all_channels = self.next_block()
         if self.new_packet_all_channels is not None:
             self.list_of_ch.clear()
             for i in self.checked_list:
@@ -179,8 +241,6 @@ class MainViewModel(QObject):
                 self.list_of_ch.append(current_data_for_plot)
 
             self.multi_data_updated.emit(self.fixed_time_window, self.list_of_ch)
-        else:
-            print("No data received from TCP client. Check connection status or server.")
 
     def create_buffers(self):
         """